@@ -1,5 +1,92 @@
 from django.contrib import admin
-from .models import CustomUser, Task
+from django.contrib.admin.exceptions import NotRegistered
+from django.db.models import QuerySet
+from django.utils import timezone
+from .models import CustomUser, Task, ArchivedTask
+from .paginator import EstimatedCountPaginator
+from .tasks import delete_in_batches
 
-admin.site.register(CustomUser)
-admin.site.register(Task)
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables with millions of rows: estimated counts, no full result count,
+    ordering on the primary key and a delete confirmation page that skips the related-object collector.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+    # Models whose rows are removed along with the selected objects; deleting requires delete permission on them too.
+    cascaded_models = ()
+
+    def get_deleted_objects(self, objs, request):
+        """
+        Summarise the objects to delete instead of collecting every related row.
+        Permissions are still checked on cascaded_models, as the collector would for registered related models.
+        """
+        count = objs.count() if isinstance(objs, QuerySet) else len(objs)
+        model_admins = [self]
+        for model in self.cascaded_models:
+            try:
+                model_admins.append(self.admin_site.get_model_admin(model))
+            except NotRegistered:
+                pass
+        perms_needed = {
+            model_admin.opts.verbose_name
+            for model_admin in model_admins
+            if not model_admin.has_delete_permission(request)
+        }
+        preview = [str(obj) for obj in objs[:self.list_per_page]]
+        return preview, {self.opts.verbose_name_plural: count}, perms_needed, []
+
+@admin.register(CustomUser)
+class CustomUserAdmin(LargeTableAdmin):
+    """
+    Deleting a user soft-deletes the account and purges its tasks in the background,
+    instead of collecting every related task in memory and deleting them in one transaction.
+    """
+    list_display = ('id', 'email', 'username', 'is_active', 'is_staff', 'date_joined', 'deleted_at')
+    # Exact, case-insensitive email search is served by the UPPER(email) index; no filters on unindexed flags.
+    search_fields = ('=email',)
+    actions = ['deactivate_users']
+    cascaded_models = (Task, ArchivedTask)
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            user.soft_delete()
+
+    @admin.action(description="Deactivate selected users")
+    def deactivate_users(self, request, queryset):
+        updated = queryset.update(is_active=False)
+        self.message_user(request, f"{updated} users deactivated.")
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'owner', 'completed', 'due_date', 'updated_at')
+    list_select_related = ('owner',)
+    list_filter = ('completed',)
+    raw_id_fields = ('owner',)
+    actions = ['mark_completed', 'mark_pending']
+    delete_batch_size = 1000
+
+    def delete_queryset(self, request, queryset):
+        """Delete selected tasks in bounded batches so a large selection does not hold long locks."""
+        for _ in delete_in_batches(queryset, self.delete_batch_size):
+            pass
+
+    @admin.action(description="Mark selected tasks as completed")
+    def mark_completed(self, request, queryset):
+        updated = queryset.update(completed=True, updated_at=timezone.now())
+        self.message_user(request, f"{updated} tasks marked as completed.")
+
+    @admin.action(description="Mark selected tasks as pending")
+    def mark_pending(self, request, queryset):
+        updated = queryset.update(completed=False, updated_at=timezone.now())
+        self.message_user(request, f"{updated} tasks marked as pending.")
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'owner', 'updated_at', 'archived_at')
+    list_select_related = ('owner',)
+    raw_id_fields = ('owner',)
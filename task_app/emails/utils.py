@@ -23,10 +23,10 @@ def send_welcome_email(to_email, username=None):
             [to_email],
             fail_silently=False
         )
-        logger.info(f"Welcome email sent successfully to {to_email}")
+        logger.info("Welcome email sent successfully to %s", to_email)
         return True
     except Exception as e:
-        logger.error(f"Failed to send welcome email to {to_email}: {str(e)}")
+        logger.error("Failed to send welcome email to %s: %s", to_email, e)
         return False
 
 def send_task_reminder_email(to_email, username, task_title, due_date=None):
@@ -48,10 +48,10 @@ def send_task_reminder_email(to_email, username, task_title, due_date=None):
             [to_email],
             fail_silently=False
         )
-        logger.info(f"Task reminder email sent successfully to {to_email}")
+        logger.info("Task reminder email sent successfully to %s", to_email)
         return True
     except Exception as e:
-        logger.error(f"Failed to send task reminder email to {to_email}: {str(e)}")
+        logger.error("Failed to send task reminder email to %s: %s", to_email, e)
         return False
 
 def send_password_reset_email(to_email, username, reset_link):
@@ -69,10 +69,10 @@ def send_password_reset_email(to_email, username, reset_link):
             [to_email],
             fail_silently=False
         )
-        logger.info(f"Password reset email sent successfully to {to_email}")
+        logger.info("Password reset email sent successfully to %s", to_email)
         return True
     except Exception as e:
-        logger.error(f"Failed to send password reset email to {to_email}: {str(e)}")
+        logger.error("Failed to send password reset email to %s: %s", to_email, e)
         return False
 
 def send_task_created_email(to_email, username, task_title, task_description=None, due_date=None):
@@ -101,8 +101,8 @@ def send_task_created_email(to_email, username, task_title, task_description=Non
             [to_email],
             fail_silently=False
         )
-        logger.info(f"Task created email sent successfully to {to_email} for task: {task_title}")
+        logger.info("Task created email sent successfully to %s for task: %s", to_email, task_title)
         return True
     except Exception as e:
-        logger.error(f"Failed to send task created email to {to_email} for task {task_title}: {str(e)}")
+        logger.error("Failed to send task created email to %s for task %s: %s", to_email, task_title, e)
         return False
@@ -0,0 +1,127 @@
+"""This module adds Idempotency-Key support to Taskly API views.
+A retried request with the same key returns the stored response instead of running the view again."""
+
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from .models import IdempotencyKey
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+class FingerprintEncoder(DjangoJSONEncoder):
+    """JSON encoder for parsed request data; uploaded files are represented by their name and size."""
+
+    def default(self, o):
+        if isinstance(o, UploadedFile):
+            return {'name': o.name, 'size': o.size}
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+def request_fingerprint(request):
+    """
+    Hash the parts of a request that must match for a key to be reused.
+    Uses the parsed request.data: under session authentication the CSRF check has already
+    consumed the body stream, so request.body is no longer readable.
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        # Form and multipart bodies: keep every value of repeated fields, not just the last.
+        data = dict(data.lists())
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(json.dumps(data, sort_keys=True, cls=FingerprintEncoder).encode())
+    return digest.hexdigest()
+
+def claim_key(user, key, fingerprint):
+    """
+    Insert the key for this user, returning (record, created).
+    The unique constraint on (user, key) acts as the lock: of several concurrent requests
+    with the same key only one inserts the row, the others get the existing record.
+    Expired rows, and in-progress rows older than IDEMPOTENCY_IN_PROGRESS_LEASE (left behind by a
+    request that died before storing its response), are removed first so the key can be reclaimed.
+    """
+    now = timezone.now()
+    IdempotencyKey.objects.filter(
+        Q(created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL))
+        | Q(response_status__isnull=True, created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_LEASE)),
+        user=user, key=key
+    ).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(user=user, key=key, request_fingerprint=fingerprint)
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+def idempotent(view_func):
+    """
+    Decorator for API view functions and methods that honours the Idempotency-Key header.
+    Only authenticated requests that send the header are affected. Server errors release the key
+    so the client can retry; any other response is stored and replayed for IDEMPOTENCY_KEY_TTL seconds.
+    """
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_func(*args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {'error': 'Idempotency-Key must be at most 255 characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_fingerprint(request)
+        record, created = claim_key(request.user, key, fingerprint)
+
+        if not created:
+            if record.request_fingerprint != fingerprint:
+                return Response(
+                    {'error': 'Idempotency-Key has already been used for a different request.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.response_status is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is already in progress.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            logger.info("Replaying stored response for Idempotency-Key %s", key)
+            return Response(
+                record.response_body,
+                status=record.response_status,
+                headers={'Idempotent-Replayed': 'true'}
+            )
+
+        try:
+            response = view_func(*args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            # update() rather than save(): the row may have been reclaimed if this request outlived its lease.
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                response_status=response.status_code,
+                response_body=response.data
+            )
+        return response
+    return wrapper
@@ -0,0 +1,36 @@
+"""Management command that measures Celery throughput for each Taskly queue."""
+
+from celery.exceptions import TimeoutError
+from celery.result import ResultSet
+from django.core.management.base import BaseCommand
+from taskly_api.celery import TASKLY_QUEUES
+from task_app.tasks import noop
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Publish no-op tasks to each queue and report publish and end-to-end throughput. "
+        "End-to-end numbers need a result backend and a worker consuming the queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=500, help="Tasks to publish per queue.")
+        parser.add_argument('--queues', nargs='*', default=list(TASKLY_QUEUES))
+        parser.add_argument('--timeout', type=float, default=120, help="Seconds to wait for each queue to drain.")
+
+    def handle(self, *args, **options):
+        count = options['tasks']
+        for queue in options['queues']:
+            start = time.perf_counter()
+            results = ResultSet([noop.apply_async(queue=queue) for _ in range(count)])
+            published = time.perf_counter() - start
+            line = f"{queue}: published {count} tasks at {count / published:.0f}/s"
+
+            if noop.app.conf.result_backend:
+                try:
+                    results.join(timeout=options['timeout'], propagate=False)
+                    completed = time.perf_counter() - start
+                    line += f", completed at {count / completed:.0f}/s"
+                except TimeoutError:
+                    line += f", only {results.completed_count()} completed within {options['timeout']:.0f}s"
+            self.stdout.write(line)
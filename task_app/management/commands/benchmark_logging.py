@@ -0,0 +1,43 @@
+"""Management command that measures the per-request cost of the logging pipeline on the calling thread."""
+
+from django.core.management.base import BaseCommand
+from taskly_api.log import JsonFormatter, QueueListenerHandler, RequestIdFilter
+import logging
+import os
+import time
+
+class Command(BaseCommand):
+    help = "Compare the caller-side cost of logging through the queue handler with a synchronous JSON handler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--calls-per-request', type=int, default=5)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        calls_per_request = options['calls_per_request']
+
+        with open(os.devnull, 'w') as devnull:
+            synchronous = logging.StreamHandler(devnull)
+            queued = QueueListenerHandler(devnull)
+            for name, handler in (('synchronous', synchronous), ('queue', queued)):
+                handler.setFormatter(JsonFormatter())
+                handler.addFilter(RequestIdFilter())
+                per_call = self.measure(handler, iterations)
+                self.stdout.write(
+                    f"{name}: {per_call * 1e6:.2f} us per call, "
+                    f"{per_call * calls_per_request * 1e6:.2f} us per request ({calls_per_request} calls)"
+                )
+            queued.close()
+
+    def measure(self, handler, iterations):
+        """Return the average seconds spent on the calling thread per logger.info call."""
+        logger = logging.getLogger('taskly_api.benchmark')
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+        start = time.perf_counter()
+        for i in range(iterations):
+            logger.info("Task created email sent to %s for task: %s", 'user@example.com', i)
+        return (time.perf_counter() - start) / iterations
@@ -0,0 +1,15 @@
+"""Management command that writes the OpenAPI schema to SCHEMA_FILE so it can be served without regeneration."""
+
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from taskly_api.schema import generate_schema
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once and write it to SCHEMA_FILE."
+
+    def handle(self, *args, **options):
+        path = Path(settings.SCHEMA_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(generate_schema())
+        self.stdout.write(self.style.SUCCESS(f"Schema written to {path}"))
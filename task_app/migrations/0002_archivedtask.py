@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('completed', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['completed', 'updated_at'], name='task_completed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL, verbose_name='owner'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['owner', '-updated_at'], name='archived_owner_updated_idx'),
+        ),
+    ]
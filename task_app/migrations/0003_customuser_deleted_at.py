@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0002_archivedtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
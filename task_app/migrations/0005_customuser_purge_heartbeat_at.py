@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='purge_heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
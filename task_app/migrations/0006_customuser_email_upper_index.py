@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('task_app', '0005_customuser_purge_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='user_email_upper_idx'),
+        ),
+    ]
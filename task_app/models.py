@@ -1,7 +1,10 @@
 """This module contains models for the Taskly application, including a custom user model and a task model."""
 
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class CustomUser(AbstractUser):
@@ -9,13 +12,31 @@ class CustomUser(AbstractUser):
     """
     email = models.EmailField(unique=True, verbose_name=_("email address"))
     username = models.CharField(max_length=150, blank=True, null=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    purge_heartbeat_at = models.DateTimeField(blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Matches the UPPER(email) = UPPER(%s) that iexact lookups compile to.
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
+    def soft_delete(self):
+        """Deactivate the account and schedule its tasks to be purged in the background.
+        The user row itself is deleted once all of its tasks are gone."""
+        from .tasks import purge_user
+
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_active', 'deleted_at'])
+        transaction.on_commit(lambda: purge_user.delay(self.pk))
+
 class Task(models.Model):
     """Model representing a task in the task management application."""
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='tasks', verbose_name=_("owner"))
@@ -26,5 +47,86 @@ class Task(models.Model):
     due_date = models.DateTimeField(blank=True, null=True)
     completed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['completed', 'updated_at'], name='task_completed_updated_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+class ArchivedTask(models.Model):
+    """Cold-storage copy of a completed task moved out of the Task table.
+    The original primary key is kept so a restored task keeps its id."""
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_tasks', verbose_name=_("owner"))
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateTimeField(blank=True, null=True)
+    completed = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    COPIED_FIELDS = ('id', 'owner_id', 'title', 'description', 'created_at', 'updated_at', 'due_date', 'completed')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-updated_at'], name='archived_owner_updated_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def archive_batch(cls, cutoff, batch_size):
+        """Move up to batch_size completed tasks last updated before cutoff into the archive.
+        Returns the number of tasks archived."""
+        with transaction.atomic():
+            rows = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(completed=True, updated_at__lt=cutoff)
+                .order_by('updated_at')
+                .values(*cls.COPIED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return 0
+            # A task can be archived twice if a save re-inserted it after an earlier archive run;
+            # keep the newest data rather than dropping it.
+            cls.objects.bulk_create(
+                [cls(**row) for row in rows],
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=[field for field in cls.COPIED_FIELDS if field != 'id'],
+            )
+            Task.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        return len(rows)
+
+    def restore(self):
+        """Move this task back into the Task table and return the restored Task."""
+        with transaction.atomic():
+            task = Task(**{field: getattr(self, field) for field in self.COPIED_FIELDS})
+            task.save(force_insert=True)
+            # auto_now_add overwrites created_at on insert, so put the original back.
+            Task.objects.filter(pk=task.pk).update(created_at=self.created_at)
+            task.created_at = self.created_at
+            self.delete()
+        return task
+
+class IdempotencyKey(models.Model):
+    """Stored response for a request sent with an Idempotency-Key header.
+    A row with no response_status marks a request that is still in progress."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.key
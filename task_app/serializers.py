@@ -3,7 +3,7 @@ This module contains serializers for the Taskly API, including user registration
 """
 
 from rest_framework import serializers
-from .models import Task, CustomUser
+from .models import Task, ArchivedTask, CustomUser
 from django.contrib.auth import authenticate, login
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -78,5 +78,15 @@ class TaskSerializer(serializers.ModelSerializer):
         instance.description = validated_data.get('description', instance.description)
         instance.due_date = validated_data.get('due_date', instance.due_date)
         instance.completed = validated_data.get('completed', instance.completed)
-        instance.save()
-        return instance
\ No newline at end of file
+        # update_fields makes Django UPDATE only, so a task archived meanwhile is not re-inserted.
+        instance.save(update_fields=['title', 'description', 'due_date', 'completed', 'updated_at'])
+        return instance
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    """Read-only serializer for archived tasks."""
+    owner = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = '__all__'
+        read_only_fields = [field.name for field in ArchivedTask._meta.fields]
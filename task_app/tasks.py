@@ -0,0 +1,121 @@
+"""This module contains Celery background jobs for the Taskly application."""
+
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q, Subquery
+from django.utils import timezone
+from .models import CustomUser, Task, ArchivedTask, IdempotencyKey
+from .emails.utils import send_welcome_email, send_task_created_email, send_task_reminder_email
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Time limits in seconds; anything not listed uses CELERY_TASK_TIME_LIMIT / CELERY_TASK_SOFT_TIME_LIMIT.
+MAIL_TIME_LIMITS = {'time_limit': 60, 'soft_time_limit': 45}
+MAINTENANCE_TIME_LIMITS = {'time_limit': 60 * 60, 'soft_time_limit': 55 * 60}
+
+# A running purge refreshes purge_heartbeat_at after every batch; one silent for longer is treated as dead.
+PURGE_LEASE = timedelta(minutes=15)
+
+@shared_task(**MAIL_TIME_LIMITS)
+def send_welcome_email_task(to_email, username=None):
+    """Send the welcome email from the transactional mail queue."""
+    return send_welcome_email(to_email, username)
+
+@shared_task(**MAIL_TIME_LIMITS)
+def send_task_created_email_task(to_email, username, task_title, task_description=None, due_date=None):
+    """Send the task created email from the transactional mail queue."""
+    return send_task_created_email(to_email, username, task_title, task_description, due_date)
+
+@shared_task(**MAIL_TIME_LIMITS)
+def send_task_reminder_email_task(to_email, username, task_title, due_date=None):
+    """Send a task reminder email from the bulk mail queue."""
+    return send_task_reminder_email(to_email, username, task_title, due_date)
+
+@shared_task(ignore_result=False)
+def noop():
+    """Do nothing; used by the benchmark_celery_queues command to measure queue throughput."""
+    return None
+
+@shared_task(**MAINTENANCE_TIME_LIMITS)
+def archive_completed_tasks(days=None, batch_size=None):
+    """Move completed tasks older than the archive threshold into cold storage in chunks."""
+    days = days if days is not None else settings.TASK_ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+
+    total = 0
+    while True:
+        archived = ArchivedTask.archive_batch(cutoff, batch_size)
+        total += archived
+        if archived < batch_size:
+            break
+
+    logger.info("Archived %s completed tasks older than %s days", total, days)
+    return total
+
+def delete_in_batches(queryset, batch_size):
+    """
+    Delete the rows matched by queryset batch_size at a time, yielding the running total after each batch.
+    For models without dependent rows or delete signals (such as Task) each batch is a single
+    DELETE ... WHERE id IN (SELECT id ... LIMIT n) statement in its own transaction,
+    so memory use and lock time stay flat however many rows match.
+    """
+    model = queryset.model
+    total = 0
+    while True:
+        batch = model._base_manager.filter(pk__in=Subquery(queryset.values('pk')[:batch_size]))
+        deleted = batch.delete()[1].get(model._meta.label, 0)
+        total += deleted
+        yield total
+        if deleted < batch_size:
+            break
+
+def purge_not_running():
+    """Filter for soft-deleted users with no live purge."""
+    return Q(purge_heartbeat_at__isnull=True) | Q(purge_heartbeat_at__lt=timezone.now() - PURGE_LEASE)
+
+@shared_task(bind=True, ignore_result=False, **MAINTENANCE_TIME_LIMITS)
+def purge_user(self, user_id, batch_size=None):
+    """
+    Delete a soft-deleted user's tasks in bounded batches, then the user itself.
+    The purge claims the user through purge_heartbeat_at, so a duplicate job exits immediately.
+    """
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    user = CustomUser.objects.filter(pk=user_id, deleted_at__isnull=False)
+    if not user.filter(purge_not_running()).update(purge_heartbeat_at=timezone.now()):
+        logger.info("Skipping purge of user %s: not deleted or already being purged", user_id)
+        return 0
+
+    deleted = 0
+    for model in (Task, ArchivedTask):
+        done = deleted
+        for total in delete_in_batches(model.objects.filter(owner_id=user_id), batch_size):
+            deleted = done + total
+            user.update(purge_heartbeat_at=timezone.now())
+            self.update_state(state='PROGRESS', meta={'user_id': user_id, 'deleted': deleted})
+            logger.debug("Purged %s tasks for user %s", deleted, user_id)
+
+    user.delete()
+    logger.info("Purged user %s and %s tasks", user_id, deleted)
+    return deleted
+
+@shared_task(**MAINTENANCE_TIME_LIMITS)
+def purge_deleted_users():
+    """Re-queue purges for soft-deleted users whose purge never started or has died."""
+    cutoff = timezone.now() - timedelta(hours=1)
+    user_ids = CustomUser.objects.filter(purge_not_running(), deleted_at__lt=cutoff).values_list('pk', flat=True)
+    for user_id in user_ids:
+        purge_user.delay(user_id)
+    return len(user_ids)
+
+@shared_task(**MAINTENANCE_TIME_LIMITS)
+def purge_expired_idempotency_keys(batch_size=1000):
+    """Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL."""
+    expired_before = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted = 0
+    for total in delete_in_batches(IdempotencyKey.objects.filter(created_at__lt=expired_before), batch_size):
+        deleted = total
+    logger.info("Purged %s expired idempotency keys", deleted)
+    return deleted
@@ -1,3 +1,541 @@
-from django.test import TestCase
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+from celery.contrib.testing.worker import start_worker
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Permission
+from django.core import mail
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from taskly_api.db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, PIN_COOKIE_NAME
+from taskly_api.celery import app as celery_app
+from taskly_api.schema import generate_schema, load_schema
+from taskly_api.log import JsonFormatter, QueueListenerHandler, live_handlers
+from .models import CustomUser, Task, ArchivedTask, IdempotencyKey
+from .admin import TaskAdmin
+from .paginator import EstimatedCountPaginator
+from .views import TaskDetailView, TaskUpdateStatusView
+from .tasks import purge_user, purge_deleted_users, send_welcome_email_task, send_task_reminder_email_task
+import gc
+import io
+import json
+import logging
+import os
+import tempfile
+import time
 
-# Create your tests here.
+def make_user(email='user@example.com', **kwargs):
+    return CustomUser.objects.create_user(email=email, username=email.split('@')[0], password='s3cret-pass', **kwargs)
+
+class ArchiveTests(TestCase):
+    """Tests for moving completed tasks into cold storage and back."""
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cutoff = timezone.now() - timedelta(days=1)
+
+    def make_old_completed_task(self, title='done'):
+        task = Task.objects.create(owner=self.user, title=title, completed=True)
+        Task.objects.filter(pk=task.pk).update(updated_at=self.cutoff - timedelta(days=1))
+        return Task.objects.get(pk=task.pk)
+
+    def test_archive_batch_moves_completed_tasks(self):
+        task = self.make_old_completed_task()
+        Task.objects.create(owner=self.user, title='pending')
+
+        self.assertEqual(ArchivedTask.archive_batch(self.cutoff, 100), 1)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertEqual(ArchivedTask.objects.get(pk=task.pk).title, 'done')
+
+    def test_archive_batch_overwrites_stale_archived_copy(self):
+        task = self.make_old_completed_task(title='current')
+        ArchivedTask.objects.create(
+            id=task.pk, owner=self.user, title='stale',
+            created_at=task.created_at, updated_at=task.updated_at
+        )
+
+        ArchivedTask.archive_batch(self.cutoff, 100)
+
+        self.assertEqual(ArchivedTask.objects.get(pk=task.pk).title, 'current')
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+
+    def test_toggle_restores_archived_task(self):
+        task = self.make_old_completed_task()
+        ArchivedTask.archive_batch(self.cutoff, 100)
+
+        response = self.client.post(f'/api/tasks/{task.pk}/toggle/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['completed'])
+        self.assertTrue(Task.objects.filter(pk=task.pk, completed=False).exists())
+        self.assertFalse(ArchivedTask.objects.filter(pk=task.pk).exists())
+
+    def fetched_before_archive(self, view_class, task):
+        """Make view_class return task as it was fetched just before the archiver moved it."""
+        ArchivedTask.archive_batch(self.cutoff, 100)
+        return mock.patch.object(view_class, 'get_object', return_value=task)
+
+    def test_update_of_task_archived_mid_request_returns_404(self):
+        task = self.make_old_completed_task()
+
+        with self.fetched_before_archive(TaskDetailView, task):
+            response = self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertEqual(ArchivedTask.objects.get(pk=task.pk).title, 'done')
+
+    def test_status_update_of_task_archived_mid_request_returns_404(self):
+        task = self.make_old_completed_task()
+
+        with self.fetched_before_archive(TaskUpdateStatusView, task):
+            response = self.client.patch(f'/api/tasks/{task.pk}/status/', {'completed': False}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertTrue(ArchivedTask.objects.get(pk=task.pk).completed)
+
+    def test_update_locks_task_row(self):
+        task = Task.objects.create(owner=self.user, title='locked')
+        with mock.patch('django.db.models.QuerySet.select_for_update', autospec=True,
+                        side_effect=lambda queryset: queryset) as select_for_update:
+            response = self.client.patch(f'/api/tasks/{task.pk}/', {'title': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        select_for_update.assert_called_once()
+
+    def test_include_archived_query_count_does_not_grow_with_archive(self):
+        for i in range(5):
+            self.make_old_completed_task(title=f'done {i}')
+        ArchivedTask.archive_batch(self.cutoff, 100)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/completed/?include_archived=true')
+        self.assertEqual(len(response.data), 5)
+
+class ReplicaRoutingTests(TestCase):
+    """Tests for sending safe requests to replicas and pinning writers to the primary."""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        self.user = make_user()
+
+    def route(self, request):
+        """Run the middleware and return the read and write aliases chosen inside the request."""
+        seen = {}
+
+        def get_response(request):
+            seen['read'] = self.router.db_for_read(Task)
+            seen['write'] = self.router.db_for_write(Task)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return seen, response
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_safe_request_reads_from_replica(self):
+        seen, _ = self.route(self.factory.get('/api/tasks/'))
+        self.assertEqual(seen, {'read': 'replica1', 'write': 'default'})
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_write_uses_primary_and_sets_pin_cookie(self):
+        seen, response = self.route(self.factory.post('/api/tasks/'))
+        self.assertEqual(seen, {'read': 'default', 'write': 'default'})
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_pinned_client_reads_from_primary(self):
+        request = self.factory.get('/api/tasks/')
+        request.COOKIES[PIN_COOKIE_NAME] = '1'
+        seen, response = self.route(request)
+        self.assertEqual(seen['read'], 'default')
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    def test_server_timing_only_for_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertNotIn('Server-Timing', client.get('/api/tasks/'))
+
+        staff = make_user('staff@example.com', is_staff=True)
+        client.force_authenticate(staff)
+        self.assertIn('Server-Timing', client.get('/api/tasks/'))
+
+@skipUnless('replica1' in settings.DATABASES, "set DB_REPLICA_URLS to run against a second database")
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Runs against a configured replica, which the test runner mirrors onto the default database."""
+    databases = {'default'} | ({'replica1'} if 'replica1' in settings.DATABASES else set())
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_list_reads_from_replica(self):
+        user = make_user()
+        Task.objects.create(owner=user, title='mirrored')
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connections['replica1']) as replica, \
+                CaptureQueriesContext(connections['default']) as primary:
+            response = client.get('/api/tasks/')
+        self.assertEqual(len(response.data), 1)
+        self.assertTrue(replica.captured_queries)
+        self.assertFalse(primary.captured_queries)
+
+class QueueListenerHandlerTests(SimpleTestCase):
+    """Tests for the background logging handler's lifecycle."""
+
+    def make_handler(self, stream):
+        handler = QueueListenerHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        return handler
+
+    def emit(self, handler, message):
+        handler.handle(logging.LogRecord('taskly_api.test', logging.INFO, __file__, 0, message, (), None))
+
+    def test_close_drains_queue_and_forgets_handler(self):
+        stream = io.StringIO()
+        handler = self.make_handler(stream)
+        self.emit(handler, 'hello')
+        handler.close()
+        handler.close()
+
+        self.assertEqual(json.loads(stream.getvalue())['message'], 'hello')
+        self.assertNotIn(handler, live_handlers)
+
+    def test_discarded_handlers_are_not_kept_alive(self):
+        before = len(live_handlers)
+        for _ in range(3):
+            self.make_handler(io.StringIO()).close()
+        gc.collect()
+        self.assertEqual(len(live_handlers), before)
+
+    @skipUnless(hasattr(os, 'fork'), "requires os.fork")
+    def test_forked_child_keeps_logging(self):
+        read_fd, write_fd = os.pipe()
+        handler = self.make_handler(os.fdopen(write_fd, 'w'))
+        self.addCleanup(handler.close)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.emit(handler, 'from child')
+                handler.listener.stop()
+                handler.target.flush()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        with os.fdopen(read_fd) as pipe:
+            os.set_blocking(pipe.fileno(), False)
+            self.assertEqual(json.loads(pipe.readline())['message'], 'from child')
+
+@override_settings(CELERY_BROKER_URL='memory://', CELERY_RESULT_BACKEND='cache+memory://')
+class CeleryQueueTests(SimpleTestCase):
+    """Tests for queue routing and delivery guarantees, run on the in-memory broker."""
+
+    def setUp(self):
+        # Drop pooled connections so the app connects to the broker configured for the test.
+        celery_app.close()
+        self.addCleanup(celery_app.close)
+
+    def test_mail_tasks_are_routed_by_latency(self):
+        route = celery_app.amqp.router.route
+        self.assertEqual(route({}, send_welcome_email_task.name)['queue'].name, 'mail')
+        self.assertEqual(route({}, send_task_reminder_email_task.name)['queue'].name, 'bulk_mail')
+        self.assertEqual(route({}, purge_user.name)['queue'].name, 'maintenance')
+
+    def test_tasks_are_acked_late_and_requeued_if_worker_is_lost(self):
+        for task in (send_welcome_email_task, purge_user):
+            self.assertTrue(task.acks_late)
+            self.assertTrue(task.reject_on_worker_lost)
+
+    def test_mail_worker_delivers_welcome_email(self):
+        with start_worker(celery_app, queues=['mail'], perform_ping_check=False, pool='solo'):
+            send_welcome_email_task.delay('new@example.com', 'new')
+            deadline = time.monotonic() + 10
+            while not mail.outbox and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+
+class PurgeUserTests(TestCase):
+    """Tests for soft-deleting users and purging their tasks in batches."""
+
+    def setUp(self):
+        self.user = make_user()
+        Task.objects.bulk_create([Task(owner=self.user, title=str(i)) for i in range(5)])
+
+    def soft_delete(self, user):
+        with mock.patch('task_app.tasks.purge_user.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                user.soft_delete()
+        delay.assert_called_once_with(user.pk)
+
+    def test_purge_deletes_tasks_in_batches_then_user(self):
+        self.soft_delete(self.user)
+        self.assertEqual(purge_user.apply(args=[self.user.pk], kwargs={'batch_size': 2}).result, 5)
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Task.objects.filter(owner_id=self.user.pk).exists())
+
+    def test_purge_ignores_users_that_are_not_deleted(self):
+        self.assertEqual(purge_user.apply(args=[self.user.pk]).result, 0)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 5)
+
+    def test_purge_skips_user_already_being_purged(self):
+        self.soft_delete(self.user)
+        CustomUser.objects.filter(pk=self.user.pk).update(purge_heartbeat_at=timezone.now())
+        self.assertEqual(purge_user.apply(args=[self.user.pk]).result, 0)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 5)
+
+    def test_sweep_requeues_only_purges_without_live_heartbeat(self):
+        self.soft_delete(self.user)
+        stalled = make_user('stalled@example.com')
+        self.soft_delete(stalled)
+        long_ago = timezone.now() - timedelta(hours=2)
+        CustomUser.objects.filter(pk=self.user.pk).update(deleted_at=long_ago, purge_heartbeat_at=timezone.now())
+        CustomUser.objects.filter(pk=stalled.pk).update(deleted_at=long_ago, purge_heartbeat_at=long_ago)
+
+        with mock.patch('task_app.tasks.purge_user.delay') as delay:
+            purge_deleted_users()
+        delay.assert_called_once_with(stalled.pk)
+
+class CustomUserAdminTests(TestCase):
+    """Tests for the user changelist on large tables."""
+
+    def setUp(self):
+        self.client.force_login(make_user('admin@example.com', is_staff=True, is_superuser=True))
+        make_user('someone@example.com')
+
+    def test_email_search_is_exact_and_case_insensitive(self):
+        response = self.client.get('/admin/task_app/customuser/', {'q': 'SomeOne@Example.com'})
+        self.assertEqual([user.email for user in response.context['cl'].result_list], ['someone@example.com'])
+
+        response = self.client.get('/admin/task_app/customuser/', {'q': 'someone'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def delete_user_as(self, staff, target):
+        self.client.force_login(staff)
+        with mock.patch('task_app.tasks.purge_user.delay'):
+            return self.client.post('/admin/task_app/customuser/', {
+                'action': 'delete_selected', '_selected_action': [target.pk], 'post': 'yes'
+            })
+
+    def test_delete_requires_delete_permission_on_cascaded_models(self):
+        target = CustomUser.objects.get(email='someone@example.com')
+        staff = make_user('staff@example.com', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(codename__in=['view_customuser', 'delete_customuser']))
+
+        self.assertEqual(self.delete_user_as(staff, target).status_code, 403)
+        target.refresh_from_db()
+        self.assertIsNone(target.deleted_at)
+
+        staff.user_permissions.add(*Permission.objects.filter(codename__in=['delete_task', 'delete_archivedtask']))
+        staff = CustomUser.objects.get(pk=staff.pk)
+        self.assertEqual(self.delete_user_as(staff, target).status_code, 302)
+        target.refresh_from_db()
+        self.assertIsNotNone(target.deleted_at)
+
+class TaskAdminTests(TestCase):
+    """Tests for the task admin actions on large tables."""
+
+    def setUp(self):
+        self.user = make_user()
+        self.model_admin = TaskAdmin(Task, admin.site)
+        self.request = RequestFactory().post('/admin/task_app/task/')
+        Task.objects.bulk_create([Task(owner=self.user, title=str(i)) for i in range(5)])
+
+    def test_status_actions_are_a_single_update(self):
+        with mock.patch.object(self.model_admin, 'message_user'):
+            with self.assertNumQueries(1):
+                self.model_admin.mark_completed(self.request, Task.objects.filter(owner=self.user))
+            self.assertEqual(Task.objects.filter(completed=True).count(), 5)
+
+            with self.assertNumQueries(1):
+                self.model_admin.mark_pending(self.request, Task.objects.filter(owner=self.user))
+            self.assertEqual(Task.objects.filter(completed=False).count(), 5)
+
+    def test_delete_queryset_deletes_selected_tasks_in_batches(self):
+        kept = Task.objects.create(owner=self.user, title='kept')
+        self.model_admin.delete_batch_size = 2
+
+        with CaptureQueriesContext(connections['default']) as queries:
+            self.model_admin.delete_queryset(self.request, Task.objects.exclude(pk=kept.pk))
+
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(list(Task.objects.all()), [kept])
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Tests for planner-estimated changelist counts."""
+
+    def setUp(self):
+        user = make_user()
+        Task.objects.bulk_create([Task(owner=user, title=str(i)) for i in range(3)])
+
+    def count(self, estimate, vendor='postgresql'):
+        with mock.patch.object(connections['default'], 'vendor', vendor), \
+                mock.patch.object(EstimatedCountPaginator, 'estimate_count', return_value=estimate) as estimate_count:
+            return EstimatedCountPaginator(Task.objects.all(), 10).count, estimate_count
+
+    def test_other_backends_use_exact_count(self):
+        count, estimate_count = self.count(50000, vendor='sqlite')
+        self.assertEqual(count, 3)
+        estimate_count.assert_not_called()
+
+    def test_small_estimate_falls_back_to_exact_count(self):
+        count, _ = self.count(EstimatedCountPaginator.exact_count_threshold - 1)
+        self.assertEqual(count, 3)
+
+    def test_large_estimate_is_used(self):
+        count, _ = self.count(50000)
+        self.assertEqual(count, 50000)
+
+    def estimate(self, queryset, *rows):
+        connection = mock.MagicMock()
+        connection.ops.quote_name = lambda name: f'"{name}"'
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = rows
+        return EstimatedCountPaginator(queryset, 10).estimate_count(queryset, connection), cursor
+
+    def test_unfiltered_estimate_reads_reltuples(self):
+        estimate, cursor = self.estimate(Task.objects.all(), (1234567,))
+        self.assertEqual(estimate, 1234567)
+        self.assertIn('pg_class', cursor.execute.call_args.args[0])
+
+    def test_unanalyzed_table_falls_back_to_explain(self):
+        estimate, cursor = self.estimate(Task.objects.all(), (-1,), ('[{"Plan": {"Plan Rows": 42}}]',))
+        self.assertEqual(estimate, 42)
+        self.assertTrue(cursor.execute.call_args.args[0].startswith('EXPLAIN (FORMAT JSON)'))
+
+    def test_filtered_estimate_reads_explain_plan_rows(self):
+        estimate, cursor = self.estimate(Task.objects.filter(completed=True), ([{'Plan': {'Plan Rows': 7}}],))
+        self.assertEqual(estimate, 7)
+        self.assertEqual(cursor.execute.call_count, 1)
+
+class SchemaTests(TestCase):
+    """Tests for generating the OpenAPI schema once and serving it from SCHEMA_FILE."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = Path(directory.name) / 'openapi' / 'schema.json'
+        override = override_settings(SCHEMA_FILE=str(self.schema_file))
+        override.enable()
+        self.addCleanup(override.disable)
+        load_schema.cache_clear()
+        self.addCleanup(load_schema.cache_clear)
+
+    def test_generate_schema_writes_schema_file(self):
+        call_command('generate_schema', stdout=io.StringIO())
+        schema = json.loads(self.schema_file.read_bytes())
+        self.assertIn('openapi', schema)
+        self.assertIn('/api/tasks/', schema['paths'])
+
+    def test_schema_is_served_from_file_with_etag(self):
+        self.schema_file.parent.mkdir(parents=True)
+        self.schema_file.write_bytes(b'{"openapi": "3.0.3", "paths": {}}')
+
+        response = self.client.get('/api/schema/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"openapi": "3.0.3", "paths": {}}')
+        self.assertTrue(response['ETag'])
+
+        response = self.client.get('/api/schema/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_is_generated_in_process_once(self):
+        with mock.patch('taskly_api.schema.generate_schema', wraps=generate_schema) as generate:
+            first = self.client.get('/api/schema/')
+            second = self.client.get('/api/schema/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('/api/tasks/', json.loads(first.content)['paths'])
+        self.assertEqual(second['ETag'], first['ETag'])
+        generate.assert_called_once()
+        self.assertFalse(self.schema_file.exists())
+
+@mock.patch('task_app.views.send_task_created_email_task.delay')
+class IdempotencyKeyTests(TestCase):
+    """Tests for Idempotency-Key handling through session login with CSRF checks enforced."""
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(enforce_csrf_checks=True)
+        response = self.client.post('/api/login/', {'email': self.user.email, 'password': 's3cret-pass'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.csrf_token = self.client.cookies['csrftoken'].value
+
+    def create_task(self, key, title='Retry me'):
+        return self.client.post(
+            '/api/tasks/', {'title': title}, format='json',
+            HTTP_X_CSRFTOKEN=self.csrf_token, HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_first_call_creates_task(self, send_email):
+        response = self.create_task('key-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+        send_email.assert_called_once()
+
+    def test_retry_replays_stored_response(self, send_email):
+        first = self.create_task('key-1')
+        retry = self.create_task('key-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+        send_email.assert_called_once()
+
+    def test_in_progress_key_returns_conflict(self, send_email):
+        self.create_task('key-1')
+        IdempotencyKey.objects.filter(key='key-1').update(response_status=None, response_body=None)
+        response = self.create_task('key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+
+    def test_abandoned_in_progress_key_is_reclaimed(self, send_email):
+        self.create_task('key-1')
+        IdempotencyKey.objects.filter(key='key-1').update(
+            response_status=None, response_body=None,
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_LEASE + 1)
+        )
+        response = self.create_task('key-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+    def test_key_reused_for_different_request_is_rejected(self, send_email):
+        self.create_task('key-1')
+        response = self.create_task('key-1', title='Something else')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+
+    def test_multipart_request_with_file_is_fingerprinted(self, send_email):
+        def create_with_file(content):
+            return self.client.post(
+                '/api/tasks/', {'title': 'Upload', 'attachment': SimpleUploadedFile('notes.txt', content)},
+                format='multipart', HTTP_X_CSRFTOKEN=self.csrf_token, HTTP_IDEMPOTENCY_KEY='upload-1'
+            )
+
+        self.assertEqual(create_with_file(b'first').status_code, 201)
+        retry = create_with_file(b'first')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(create_with_file(b'a longer file').status_code, 422)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 1)
+
+    def test_toggle_is_not_repeated(self, send_email):
+        task = Task.objects.create(owner=self.user, title='toggle')
+        for _ in range(2):
+            response = self.client.post(
+                f'/api/tasks/{task.pk}/toggle/', HTTP_X_CSRFTOKEN=self.csrf_token, HTTP_IDEMPOTENCY_KEY='toggle-1'
+            )
+            self.assertTrue(response.data['completed'])
+        task.refresh_from_db()
+        self.assertTrue(task.completed)
@@ -1,22 +1,41 @@
 """This module contains views for the Taskly API, including user registration, login, and task management."""
 
+from contextlib import contextmanager
 from rest_framework.views import APIView
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import api_view, permission_classes
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.db import DatabaseError, transaction
 from django.db.models import Q
 from django.utils import timezone
-from drf_spectacular.utils import extend_schema, extend_schema_view
-from drf_spectacular.openapi import OpenApiParameter, OpenApiTypes
-from .serializers import RegisterSerializer, EmailLoginSerializer, TaskSerializer
-from .models import Task
-from .emails.utils import send_welcome_email, send_task_created_email
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from .serializers import RegisterSerializer, EmailLoginSerializer, TaskSerializer, ArchivedTaskSerializer
+from .models import Task, ArchivedTask
+from .tasks import send_welcome_email_task, send_task_created_email_task
+from .idempotency import idempotent, IDEMPOTENCY_HEADER
 import logging
 
 logger = logging.getLogger(__name__)
 
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    IDEMPOTENCY_HEADER, OpenApiTypes.STR, OpenApiParameter.HEADER,
+    description='Unique key for safely retrying the request; retries return the stored response'
+)
+
+def include_archived(request):
+    """Return True when the request asks for archived tasks via ?include_archived=true."""
+    value = request.query_params.get('include_archived', '')
+    return value.lower() in ['true', '1', 'yes']
+
+def merge_archived(data, archived_queryset, sort_key, reverse=True):
+    """Append serialized archived tasks to already serialized task data and re-sort."""
+    data = list(data) + ArchivedTaskSerializer(archived_queryset, many=True).data
+    return sorted(data, key=lambda item: item[sort_key] or '', reverse=reverse)
+
 class RegisterView(APIView):
     """View for user registration."""
     permission_classes = [AllowAny]
@@ -27,13 +46,13 @@ class RegisterView(APIView):
             
             try:
                 username = getattr(user, 'username', None) or str(user.email).split('@')[0]
-                send_welcome_email(
+                send_welcome_email_task.delay(
                     to_email=user.email,
                     username=username
                 )
-                logger.info(f"Welcome email sent to {user.email}")
+                logger.info("Welcome email queued for %s", user.email)
             except Exception as e:
-                logger.error(f"Failed to send welcome email to {user.email}: {str(e)}")
+                logger.error("Failed to queue welcome email to %s: %s", user.email, e)
             
             return Response({
                 "message": "User registered successfully.",
@@ -58,12 +77,14 @@ class EmailLoginView(APIView):
         parameters=[
             OpenApiParameter('search', OpenApiTypes.STR, OpenApiParameter.QUERY, description='Search in title/description'),
             OpenApiParameter('completed', OpenApiTypes.BOOL, OpenApiParameter.QUERY, description='Filter by completion status'),
+            OpenApiParameter('include_archived', OpenApiTypes.BOOL, OpenApiParameter.QUERY, description='Include archived completed tasks'),
         ],
         tags=['Tasks']
     ),
     create=extend_schema(
         summary="Create new task",
         description="Create a new task and send email notification",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         tags=['Tasks']
     )
 )
@@ -93,24 +114,83 @@ class TaskListCreateView(generics.ListCreateAPIView):
             
         return queryset.order_by('-created_at')
 
+    def get_archived_queryset(self):
+        """Return archived tasks for the authenticated user matching the list filters."""
+        queryset = ArchivedTask.objects.filter(owner=self.request.user).select_related('owner')
+
+        search = self.request.query_params.get('search', None)
+        if search:
+            queryset = queryset.filter(
+                Q(title__icontains=search) | Q(description__icontains=search)
+            )
+
+        completed = self.request.query_params.get('completed', None)
+        if completed is not None and completed.lower() not in ['true', '1', 'yes']:
+            return queryset.none()
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """List tasks, merging in archived tasks when ?include_archived=true."""
+        response = super().list(request, *args, **kwargs)
+        if include_archived(request):
+            response.data = merge_archived(response.data, self.get_archived_queryset(), 'created_at')
+        return response
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """Create a task, replaying the stored response for a repeated Idempotency-Key."""
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """Automatically assign the authenticated user as the owner and send email notification."""
         task = serializer.save(owner=self.request.user)
         
         try:
             username = getattr(self.request.user, 'username', None) or str(self.request.user.email).split('@')[0]
-            send_task_created_email(
+            send_task_created_email_task.delay(
                 to_email=self.request.user.email,
                 username=username,
                 task_title=task.title,
                 task_description=getattr(task, 'description', None),
                 due_date=getattr(task, 'due_date', None)
             )
-            logger.info(f"Task created email sent to {self.request.user.email} for task: {task.title}")
+            logger.info("Task created email queued for %s for task: %s", self.request.user.email, task.title)
         except Exception as e:
-            logger.error(f"Failed to send task created email to {self.request.user.email}: {str(e)}")
+            logger.error("Failed to queue task created email to %s: %s", self.request.user.email, e)
+
+class LockedTaskUpdateMixin:
+    """
+    Lock the task row for PUT/PATCH so the archiver, which skips locked rows, cannot move it mid-update.
+    Saves use update_fields and never re-insert a row; on databases without SELECT ... FOR UPDATE a task
+    archived between fetch and save is reported as 404 rather than failing the save.
+    """
+
+    def get_object(self):
+        """Get task object ensuring it belongs to the authenticated user, locked when it is being updated."""
+        queryset = self.get_queryset()
+        if self.request.method in ('PUT', 'PATCH'):
+            queryset = queryset.select_for_update()
+        obj = get_object_or_404(queryset, pk=self.kwargs.get('pk'))
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    @contextmanager
+    def locked_update(self):
+        """Run the update in a transaction so the row lock is held until the save; a vanished task becomes a 404."""
+        try:
+            with transaction.atomic():
+                yield
+        except DatabaseError:
+            if self.get_queryset().filter(pk=self.kwargs.get('pk')).exists():
+                raise
+            raise Http404
+
+    def update(self, request, *args, **kwargs):
+        with self.locked_update():
+            return super().update(request, *args, **kwargs)
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailView(LockedTaskUpdateMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a specific task for the authenticated user.
     GET: Returns task details if owned by authenticated user
@@ -124,13 +204,7 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
         """Return tasks only for the authenticated user."""
         return Task.objects.filter(owner=self.request.user)
 
-    def get_object(self):
-        """Get task object ensuring it belongs to the authenticated user."""
-        queryset = self.get_queryset()
-        obj = get_object_or_404(queryset, pk=self.kwargs.get('pk'))
-        return obj
-
-class TaskUpdateStatusView(generics.UpdateAPIView):
+class TaskUpdateStatusView(LockedTaskUpdateMixin, generics.UpdateAPIView):
     """
     Update only the completion status of a task.
     PATCH: Toggle or set the completion status of a task
@@ -144,14 +218,15 @@ class TaskUpdateStatusView(generics.UpdateAPIView):
 
     def patch(self, request, *args, **kwargs):
         """Update only the completed field."""
-        task = self.get_object()
-        completed = request.data.get('completed')
-        
-        if completed is not None:
-            task.completed = completed
-            task.save()
-            serializer = self.get_serializer(task)
-            return Response(serializer.data)
+        with self.locked_update():
+            task = self.get_object()
+            completed = request.data.get('completed')
+
+            if completed is not None:
+                task.completed = completed
+                task.save(update_fields=['completed', 'updated_at'])
+                serializer = self.get_serializer(task)
+                return Response(serializer.data)
         
         return Response(
             {'error': 'completed field is required'}, 
@@ -173,6 +248,14 @@ class TaskCompletedListView(generics.ListAPIView):
             completed=True
         ).order_by('-updated_at')
 
+    def list(self, request, *args, **kwargs):
+        """List completed tasks, merging in archived tasks when ?include_archived=true."""
+        response = super().list(request, *args, **kwargs)
+        if include_archived(request):
+            archived = ArchivedTask.objects.filter(owner=request.user).select_related('owner')
+            response.data = merge_archived(response.data, archived, 'updated_at')
+        return response
+
 class TaskPendingListView(generics.ListAPIView):
     """
     List only pending (incomplete) tasks for the authenticated user.
@@ -191,26 +274,33 @@ class TaskPendingListView(generics.ListAPIView):
 @extend_schema(
     summary="Toggle task status",
     description="Toggle completion status of a task",
+    parameters=[IDEMPOTENCY_KEY_PARAMETER],
     tags=['Tasks'],
     responses={200: TaskSerializer}
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def toggle_task_status(request, pk):
     """
     Toggle the completion status of a task.
     POST: Toggles between completed and pending status
+    Archived tasks are restored to the task table before being toggled.
     """
-    try:
-        task = Task.objects.get(pk=pk, owner=request.user)
-    except Task.DoesNotExist:
-        return Response(
-            {'error': 'Task not found or you do not have permission to access it.'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
-    task.completed = not task.completed
-    task.save()
+    with transaction.atomic():
+        # Locking the row keeps the archiver (which skips locked rows) from moving it mid-toggle.
+        task = Task.objects.select_for_update().filter(pk=pk, owner=request.user).first()
+        if task is None:
+            archived = ArchivedTask.objects.select_for_update().filter(pk=pk, owner=request.user).first()
+            if archived is None:
+                return Response(
+                    {'error': 'Task not found or you do not have permission to access it.'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            task = archived.restore()
+
+        task.completed = not task.completed
+        task.save(update_fields=['completed', 'updated_at'])
     
     serializer = TaskSerializer(task)
     return Response(serializer.data)
@@ -218,6 +308,9 @@ def toggle_task_status(request, pk):
 @extend_schema(
     summary="Get task statistics",
     description="Get task counts and completion rate",
+    parameters=[
+        OpenApiParameter('include_archived', OpenApiTypes.BOOL, OpenApiParameter.QUERY, description='Count archived completed tasks'),
+    ],
     tags=['Statistics']
 )
 @api_view(['GET'])
@@ -231,6 +324,11 @@ def task_stats(request):
     total_tasks = user_tasks.count()
     completed_tasks = user_tasks.filter(completed=True).count()
     pending_tasks = user_tasks.filter(completed=False).count()
+
+    if include_archived(request):
+        archived_tasks = ArchivedTask.objects.filter(owner=request.user).count()
+        total_tasks += archived_tasks
+        completed_tasks += archived_tasks
     
     overdue_tasks = user_tasks.filter(
         completed=False,
@@ -1,9 +1,60 @@
-"""This module initializes the Celery application for the Taskly API project."""
+"""This module initializes the Celery application for the Taskly API project.
+
+Queues:
+    mail         transactional email (welcome, task created), latency sensitive
+    bulk_mail    reminders and other bulk or digest email
+    maintenance  archiving and purge jobs, long running
+    default      anything not routed explicitly
+
+Run one worker per queue so each gets its own prefetch multiplier, e.g.
+    celery -A taskly_api worker -Q mail -c 8
+"""
 
 import os
-from celery import Celery
+from celery import Celery, bootsteps
+from kombu import Exchange, Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskly_api.settings')
 app = Celery('taskly_api')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+
+@app.on_after_configure.connect
+def create_local_folders(sender, **kwargs):
+    """
+    Create the folders used by the filesystem transport and the file:// result backend.
+    Runs in every process that uses the app, so web processes publishing tasks get them too.
+    """
+    options = sender.conf.broker_transport_options or {}
+    folders = [options[key] for key in ('data_folder_in', 'data_folder_out', 'control_folder') if key in options]
+    backend = sender.conf.result_backend or ''
+    if backend.startswith('file://'):
+        folders.append(backend[len('file://'):])
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+TASKLY_QUEUES = ('default', 'mail', 'bulk_mail', 'maintenance')
+app.conf.task_queues = [Queue(name, Exchange(name), routing_key=name) for name in TASKLY_QUEUES]
+
+class QueuePrefetchStep(bootsteps.Step):
+    """
+    Apply the prefetch multiplier configured for the queues this worker consumes.
+    When a worker consumes several queues the smallest multiplier wins, so long jobs are never over-fetched.
+    An explicit --prefetch-multiplier on the command line still takes precedence.
+    """
+
+    def __init__(self, worker, **kwargs):
+        from django.conf import settings
+
+        if kwargs.get('prefetch_multiplier') not in (None, app.conf.worker_prefetch_multiplier):
+            return
+        consumed = worker.app.amqp.queues.consume_from
+        multipliers = [
+            settings.CELERY_QUEUE_PREFETCH_MULTIPLIERS[name]
+            for name in consumed
+            if name in settings.CELERY_QUEUE_PREFETCH_MULTIPLIERS
+        ]
+        if multipliers:
+            worker.prefetch_multiplier = min(multipliers)
+
+app.steps['worker'].add(QueuePrefetchStep)
+app.autodiscover_tasks()
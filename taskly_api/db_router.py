@@ -0,0 +1,104 @@
+"""This module contains the database router and middleware that send safe requests to read replicas.
+Users are pinned to the primary for a short window after a write so they always read their own changes."""
+
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_DB = 'default'
+PIN_COOKIE_NAME = 'taskly_pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Replica alias chosen for the current request, or None to read from the primary.
+_read_alias = ContextVar('taskly_read_alias', default=None)
+
+class PrimaryReplicaRouter:
+    """Route reads to the replica picked for the current request and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
+
+class QueryMetrics:
+    """Execute wrapper that counts queries and time spent per database alias."""
+
+    def __init__(self):
+        self.queries = {}
+        self.duration = {}
+
+    def wrapper(self, alias):
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries[alias] = self.queries.get(alias, 0) + 1
+                self.duration[alias] = self.duration.get(alias, 0.0) + (time.perf_counter() - start)
+        return execute
+
+    def server_timing(self):
+        """Return the metrics formatted as a Server-Timing header value."""
+        return ', '.join(
+            f'db-{alias};dur={self.duration[alias] * 1000:.2f};desc="{count} queries"'
+            for alias, count in sorted(self.queries.items())
+        )
+
+class ReplicaRoutingMiddleware:
+    """
+    Pick a replica for safe requests unless the client recently wrote, and pin the client
+    to the primary for REPLICA_PIN_SECONDS after any unsafe request.
+    Per-alias query counts and timings are logged, and returned in the Server-Timing header
+    only under DEBUG or to staff users so the database layout is not exposed publicly.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        use_replica = (
+            replicas
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE_NAME not in request.COOKIES
+        )
+        token = _read_alias.set(random.choice(replicas) if use_replica else None)
+        metrics = QueryMetrics()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics.wrapper(alias)))
+                response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+
+        if metrics.queries:
+            logger.info(
+                "DB queries for %s %s: %s", request.method, request.path, metrics.queries,
+                extra={'db_duration_ms': {alias: round(value * 1000, 2) for alias, value in metrics.duration.items()}}
+            )
+            user = getattr(request, 'user', None)
+            if settings.DEBUG or getattr(user, 'is_staff', False):
+                response['Server-Timing'] = metrics.server_timing()
+        return response
@@ -0,0 +1,141 @@
+"""This module contains the structured logging pipeline for the Taskly API project.
+Records are tagged with the current request id and sampled on the calling thread,
+then formatted as JSON and written by a background QueueListener thread."""
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+import uuid
+import weakref
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+
+request_id = ContextVar('taskly_request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is emitted as a field.
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+class RequestIdFilter(logging.Filter):
+    """
+    Attach the id of the request being handled to every record.
+    django.request logs after the middleware has returned, so fall back to the id stored on the request.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id.get() or getattr(getattr(record, 'request', None), 'request_id', None)
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records at or below `level`; more severe records always pass."""
+
+    def __init__(self, rate=1.0, level='INFO'):
+        super().__init__()
+        self.rate = rate
+        self.levelno = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def filter(self, record):
+        return record.levelno > self.levelno or self.rate >= 1 or random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in RESERVED_ATTRS})
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Handler that only enqueues records on the calling thread.
+    Message formatting and stream I/O happen on a QueueListener thread, which is replaced after fork
+    so prefork Celery and gunicorn workers keep logging.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.target = logging.StreamHandler(stream)
+        self.listener = None
+        self.start_listener()
+        live_handlers.add(self)
+
+    def start_listener(self):
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def restart_listener(self):
+        # The parent's listener thread does not exist in the child. Start over on a fresh queue so
+        # records still pending in the parent are not written twice.
+        self.queue = queue.SimpleQueue()
+        self.start_listener()
+
+    def close(self):
+        # Called by logging.shutdown() at exit; stopping the listener drains the queue first.
+        live_handlers.discard(self)
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Leave formatting to the listener thread.
+        return record
+
+# Handlers whose listener should be restarted in forked children; closed or collected handlers drop out.
+live_handlers = weakref.WeakSet()
+
+def restart_listeners():
+    for handler in list(live_handlers):
+        handler.restart_listener()
+
+os.register_at_fork(after_in_child=restart_listeners)
+
+class RequestIdMiddleware:
+    """
+    Assign each request an id (from the X-Request-ID header when valid), expose it to log records
+    and the response, and log the request duration.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        current_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        request.request_id = current_id
+        token = request_id.set(current_id)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={'duration_ms': round((time.perf_counter() - start) * 1000, 2)}
+            )
+        finally:
+            request_id.reset(token)
+
+        response[REQUEST_ID_HEADER] = current_id
+        return response
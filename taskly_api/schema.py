@@ -0,0 +1,57 @@
+"""This module serves the precomputed OpenAPI schema for the Taskly API.
+The schema is read from SCHEMA_FILE (written by the generate_schema management command) once per process
+and served with an ETag, so documentation traffic never triggers a full introspection pass."""
+
+from functools import lru_cache
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+def generate_schema():
+    """Build the OpenAPI schema as JSON bytes using drf-spectacular."""
+    output = StringIO()
+    call_command('spectacular', format='openapi-json', stdout=output)
+    return output.getvalue().encode('utf-8')
+
+@lru_cache(maxsize=1)
+def load_schema():
+    """Return the schema bytes and their ETag, generating the schema only if no file was built."""
+    path = Path(settings.SCHEMA_FILE)
+    if path.exists():
+        content = path.read_bytes()
+    else:
+        logger.warning("Schema file %s not found, generating schema in-process", path)
+        content = generate_schema()
+    return content, hashlib.sha256(content).hexdigest()
+
+def schema_etag(request, *args, **kwargs):
+    return load_schema()[1]
+
+@require_safe
+@condition(etag_func=schema_etag)
+def schema_view(request):
+    """Serve the cached OpenAPI schema, answering conditional requests with 304 Not Modified."""
+    content, _ = load_schema()
+    response = HttpResponse(content, content_type='application/vnd.oai.openapi+json')
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+def lazy_view(dotted_path, **initkwargs):
+    """Return a view that imports a class-based view on first use, keeping it out of the import path at boot."""
+    @lru_cache(maxsize=1)
+    def resolve():
+        module_path, class_name = dotted_path.rsplit('.', 1)
+        return getattr(import_module(module_path), class_name).as_view(**initkwargs)
+
+    def view(request, *args, **kwargs):
+        return resolve()(request, *args, **kwargs)
+    return view
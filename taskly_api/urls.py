@@ -2,12 +2,12 @@
 
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from .schema import schema_view, lazy_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('task_app.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularSwaggerView.as_view(url_name='schema', template_name='redoc.html'), name='redoc'),
+    path('api/schema/', schema_view, name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
 ]